@@ -8,11 +8,21 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 # Import from src modules
 from src.rag.engine import MinimalRAG
-from src.config.settings import DATABASE_URI, DATABASE_USER, DATABASE_PASSWORD
+from src.config.settings import (
+    DATABASE_URI,
+    DATABASE_USER,
+    DATABASE_PASSWORD,
+    NORMALIZE_EMBEDDINGS,
+    VECTOR_INDEX,
+    VECTOR_OVERSAMPLE,
+)
+from src.database.graph_handler import MAX_SUBGRAPH_NODES
 
 # Set page configuration
 st.set_page_config(page_title="Minimal RAG System", page_icon="🧠", layout="wide")
 
+DOCUMENTS_PER_PAGE = 50
+
 
 # Initialize session state
 def init_session_state():
@@ -27,6 +37,30 @@ def init_session_state():
         st.session_state.active_page = "Data Collection"
 
 
+def subgraph_to_dot(subgraph):
+    """Render a subgraph returned by the database handler as Graphviz DOT"""
+
+    def quote(value):
+        return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+    lines = ["digraph G {", "rankdir=LR;", 'node [fontsize=10, style=filled];']
+    for node in subgraph["nodes"]:
+        if node["type"] == "Document":
+            attrs = f"label={quote(node['label'])}, shape=box, fillcolor=lightblue"
+        else:
+            attrs = f"label={quote(node['label'])}, shape=ellipse, fillcolor=lightyellow"
+            if node.get("preview"):
+                attrs += f", tooltip={quote(node['preview'])}"
+        lines.append(f"{quote(node['id'])} [{attrs}];")
+    for edge in subgraph["edges"]:
+        lines.append(
+            f"{quote(edge['source'])} -> {quote(edge['target'])} "
+            f"[label={quote(edge['type'])}, fontsize=8];"
+        )
+    lines.append("}")
+    return "\n".join(lines)
+
+
 # Main title
 st.title("🧠 NexusRAG: RAG App with Graph Database")
 
@@ -49,7 +83,12 @@ with st.sidebar:
             with st.spinner("Connecting to database..."):
                 try:
                     st.session_state.rag = MinimalRAG(
-                        db_uri=db_uri, db_user=db_user, db_password=db_password
+                        db_uri=db_uri,
+                        db_user=db_user,
+                        db_password=db_password,
+                        normalize_embeddings=NORMALIZE_EMBEDDINGS,
+                        vector_index=VECTOR_INDEX,
+                        oversample=VECTOR_OVERSAMPLE,
                     )
                     st.session_state.db_connected = True
                     st.sidebar.success("Connected to database!")
@@ -144,32 +183,98 @@ else:  # Knowledge Graph
     if not st.session_state.db_connected:
         st.warning("Please connect to the database using the sidebar first.")
     else:
-        st.info("Knowledge graph visualization will be implemented in a future update.")
-
-        # Placeholder for the graph visualization
-        st.write("A visualization of your knowledge graph would appear here.")
-
-        # Add some basic graph statistics
-        if st.button("Get Graph Statistics"):
-            try:
-                # Query to count nodes and relationships
-                doc_count = st.session_state.rag.db.run_query(
-                    "MATCH (d:Document) RETURN count(d) as count"
-                ).data()[0]["count"]
-                chunk_count = st.session_state.rag.db.run_query(
-                    "MATCH (c:Chunk) RETURN count(c) as count"
-                ).data()[0]["count"]
-                rel_count = st.session_state.rag.db.run_query(
-                    "MATCH ()-[r]->() RETURN count(r) as count"
-                ).data()[0]["count"]
-
-                # Display the statistics
-                col1, col2, col3 = st.columns(3)
+        db = st.session_state.rag.db
+
+        # Graph statistics (count-store backed and cached by the database handler)
+        refresh_stats = st.button("Refresh Graph Statistics")
+        try:
+            stats = db.get_graph_stats(refresh=refresh_stats)
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Documents", stats.get("documents", 0))
+            with col2:
+                st.metric("Chunks", stats.get("chunks", 0))
+            with col3:
+                st.metric("Relationships", stats.get("relationships", 0))
+        except Exception as e:
+            st.error(f"Error retrieving graph statistics: {str(e)}")
+
+        st.subheader("Explore")
+
+        view_mode = st.radio(
+            "View", ["Document", "Chunk Neighbourhood", "Random Sample"], horizontal=True
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            max_nodes = st.slider("Maximum nodes", 10, MAX_SUBGRAPH_NODES, 100)
+        with col2:
+            preview_chars = st.slider("Chunk preview length", 0, 200, 60)
+
+        subgraph = None
+        try:
+            if view_mode == "Document":
+                col1, col2 = st.columns(2)
                 with col1:
-                    st.metric("Documents", doc_count)
+                    title_prefix = st.text_input("Document title starts with")
                 with col2:
-                    st.metric("Chunks", chunk_count)
-                with col3:
-                    st.metric("Relationships", rel_count)
-            except Exception as e:
-                st.error(f"Error retrieving graph statistics: {str(e)}")
+                    doc_page = st.number_input("Document page", min_value=1, value=1)
+
+                documents = db.list_documents(
+                    title_prefix,
+                    skip=(doc_page - 1) * DOCUMENTS_PER_PAGE,
+                    limit=DOCUMENTS_PER_PAGE,
+                )
+                if not documents:
+                    st.info("No documents found on this page.")
+                else:
+                    selected = st.selectbox(
+                        "Document",
+                        documents,
+                        format_func=lambda doc: f"{doc['title']} ({doc['source']})",
+                    )
+                    chunk_page = st.number_input("Chunk page", min_value=1, value=1)
+                    # One node of every page is the document itself
+                    subgraph = db.get_document_subgraph(
+                        selected["source"],
+                        skip=(chunk_page - 1) * (max_nodes - 1),
+                        limit=max_nodes,
+                        preview_chars=preview_chars,
+                    )
+
+            elif view_mode == "Chunk Neighbourhood":
+                chunk_id = st.text_input("Chunk ID")
+                depth = st.slider("Depth (FOLLOWS hops)", 1, 5, 2)
+                if chunk_id.strip():
+                    subgraph = db.get_chunk_neighbourhood(
+                        chunk_id.strip(),
+                        depth=depth,
+                        limit=max_nodes,
+                        preview_chars=preview_chars,
+                    )
+
+            else:  # Random Sample
+                if "sample_seed" not in st.session_state:
+                    st.session_state.sample_seed = int(time.time())
+                num_documents = st.slider("Documents", 1, 50, 5)
+                if st.button("Resample"):
+                    st.session_state.sample_seed = int(time.time())
+                subgraph = db.get_random_subgraph(
+                    documents=num_documents,
+                    chunks_per_document=max_nodes,
+                    preview_chars=preview_chars,
+                    seed=st.session_state.sample_seed,
+                    limit=max_nodes,
+                )
+        except Exception as e:
+            st.error(f"Error retrieving subgraph: {str(e)}")
+
+        if subgraph is not None:
+            if not subgraph["nodes"]:
+                st.info("Nothing to show for this selection.")
+            else:
+                st.caption(
+                    f"Showing {len(subgraph['nodes'])} nodes and "
+                    f"{len(subgraph['edges'])} relationships"
+                )
+                st.graphviz_chart(subgraph_to_dot(subgraph))
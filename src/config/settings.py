@@ -16,3 +16,9 @@ LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
 # Processing settings
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "500"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "50"))
+
+# Vector search settings
+NORMALIZE_EMBEDDINGS = os.getenv("NORMALIZE_EMBEDDINGS", "false").lower() == "true"
+# "int8", "pca" or unset for exact search; validated by GraphDatabase
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "").strip().lower() or None
+VECTOR_OVERSAMPLE = int(os.getenv("VECTOR_OVERSAMPLE", "4"))
@@ -0,0 +1,478 @@
+# src/data/bulk_import.py
+"""
+Offline bulk import for large local corpora
+
+Streams documents from JSONL, a directory of text files or a Wikipedia XML dump,
+chunks and embeds them in batches and writes the vector store directly. Graph
+data is written either to Neo4j in batched transactions or as CSV files for
+`neo4j-admin database import`. Progress is checkpointed after every batch so an
+interrupted import can be resumed with --resume.
+
+Example:
+    python -m src.data.bulk_import --format wikipedia \\
+        --input enwiki-latest-pages-articles.xml.bz2 --output-dir import_out
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import time
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from src.config.settings import (
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    DATABASE_PASSWORD,
+    DATABASE_URI,
+    DATABASE_USER,
+    EMBEDDING_MODEL,
+    NORMALIZE_EMBEDDINGS,
+    VECTOR_INDEX,
+)
+from src.data.corpus_reader import (
+    iter_jsonl_documents,
+    iter_text_documents,
+    iter_wikipedia_dump,
+)
+from src.data.embedding import generate_embeddings
+from src.data.text_processor import chunk_text
+from src.database.vector_index import (
+    VECTOR_INDEX_METHODS,
+    build_vector_index,
+    index_paths,
+    normalize_embeddings,
+    remove_vector_index,
+)
+
+CHECKPOINT_FILE = "checkpoint.json"
+SHARD_DIR = "embedding_shards"
+
+# Arguments that must be unchanged for a run to be resumed from its checkpoint
+RESUME_PARAMS = (
+    "input",
+    "format",
+    "graph",
+    "chunk_size",
+    "chunk_overlap",
+    "embedding_model",
+    "normalize",
+    "text_field",
+    "title_field",
+    "source_field",
+    "pattern",
+)
+
+# File name -> header row in the format expected by neo4j-admin import
+CSV_HEADERS = {
+    "documents.csv": ["source:ID(Document)", "title", ":LABEL"],
+    "chunks.csv": ["id:ID(Chunk)", "text", "chunk_index:int", ":LABEL"],
+    "part_of.csv": [":START_ID(Chunk)", ":END_ID(Document)", ":TYPE"],
+    "follows.csv": [":START_ID(Chunk)", ":END_ID(Chunk)", ":TYPE"],
+}
+
+
+def open_document_stream(args: argparse.Namespace) -> Iterator[Dict[str, Any]]:
+    """Open the document iterator for the selected input format"""
+    if args.format == "jsonl":
+        return iter_jsonl_documents(
+            args.input,
+            text_field=args.text_field,
+            title_field=args.title_field,
+            source_field=args.source_field,
+        )
+    if args.format == "text":
+        return iter_text_documents(args.input, pattern=args.pattern)
+    if args.format == "wikipedia":
+        return iter_wikipedia_dump(args.input)
+    raise ValueError(f"Unsupported input format: {args.format}")
+
+
+def batched(iterable: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """Yield lists of up to batch_size items from an iterable"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def load_checkpoint(output_dir: str) -> Optional[Dict[str, Any]]:
+    """Load the import checkpoint if one exists"""
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(output_dir: str, checkpoint: Dict[str, Any]):
+    """Atomically write the import checkpoint"""
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class CsvGraphWriter:
+    """Append graph rows to CSV files for Neo4j's offline bulk importer"""
+
+    def __init__(self, output_dir: str, offsets: Optional[Dict[str, int]] = None):
+        self.files = {}
+        self.writers = {}
+
+        for name, header in CSV_HEADERS.items():
+            path = os.path.join(output_dir, name)
+            if offsets is not None and os.path.exists(path):
+                # Drop rows written after the last checkpoint
+                f = open(path, "r+", encoding="utf-8", newline="")
+                f.truncate(offsets.get(name, 0))
+                f.seek(0, os.SEEK_END)
+            else:
+                f = open(path, "w", encoding="utf-8", newline="")
+
+            writer = csv.writer(f)
+            if f.tell() == 0:
+                writer.writerow(header)
+
+            self.files[name] = f
+            self.writers[name] = writer
+
+    def write(self, chunks: List[Dict[str, Any]]):
+        """Write document, chunk and relationship rows for a batch of chunks"""
+        seen_sources = set()
+        for chunk in chunks:
+            source = chunk["source"]
+            if source not in seen_sources:
+                seen_sources.add(source)
+                self.writers["documents.csv"].writerow(
+                    [source, chunk["title"], "Document"]
+                )
+
+            self.writers["chunks.csv"].writerow(
+                [chunk["id"], chunk["text"], chunk["chunk_index"], "Chunk"]
+            )
+            self.writers["part_of.csv"].writerow([chunk["id"], source, "PART_OF"])
+
+            if chunk["chunk_index"] > 0:
+                prev_id = f"{source}_{chunk['chunk_index'] - 1}"
+                self.writers["follows.csv"].writerow([chunk["id"], prev_id, "FOLLOWS"])
+
+    def offsets(self) -> Dict[str, int]:
+        """Flush all files and return their current sizes"""
+        for f in self.files.values():
+            f.flush()
+            os.fsync(f.fileno())
+        return {name: f.tell() for name, f in self.files.items()}
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+def write_embedding_shard(
+    output_dir: str,
+    shard_index: int,
+    chunks: List[Dict[str, Any]],
+    normalize: bool = False,
+) -> Dict[str, Any]:
+    """Write the embeddings of one batch to its own shard file"""
+    shard_dir = os.path.join(output_dir, SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    embeddings = np.array([chunk["embedding"] for chunk in chunks], dtype=np.float32)
+    if normalize:
+        embeddings = normalize_embeddings(embeddings)
+    ids = np.array([chunk["id"] for chunk in chunks])
+
+    path = os.path.join(shard_dir, f"shard_{shard_index:06d}.npz")
+    np.savez(path, embeddings=embeddings, ids=ids)
+
+    return {
+        "path": path,
+        "count": len(chunks),
+        "dim": int(embeddings.shape[1]),
+        "id_length": max(len(chunk["id"]) for chunk in chunks),
+    }
+
+
+def merge_embedding_shards(
+    shards: List[Dict[str, Any]],
+    file_path: str,
+    normalized: bool = False,
+    write_full: bool = False,
+) -> int:
+    """
+    Merge embedding shards into a single file readable by find_similar_chunks
+
+    The arrays are streamed shard by shard into the .npz archive, so the full
+    matrix never has to fit in memory. With write_full the vectors are also
+    written to the memory-mappable .full.npy used by the compressed index.
+    Returns the number of merged embeddings.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+
+    total = sum(shard["count"] for shard in shards)
+    dim = shards[0]["dim"] if shards else 0
+    if any(shard["dim"] != dim for shard in shards):
+        raise ValueError("Embedding shards have different dimensions")
+    id_dtype = np.dtype(f"<U{max((s['id_length'] for s in shards), default=1)}")
+
+    arrays = [
+        ("embeddings", np.dtype(np.float32), (total, dim)),
+        ("ids", id_dtype, (total,)),
+    ]
+
+    # The store is being rewritten, so any existing index is stale
+    remove_vector_index(file_path)
+    full = None
+    if write_full and total > 0:
+        _, full_path = index_paths(file_path)
+        full = np.lib.format.open_memmap(
+            full_path, mode="w+", dtype=np.float32, shape=(total, dim)
+        )
+
+    with zipfile.ZipFile(file_path, "w", allowZip64=True) as archive:
+        for name, dtype, shape in arrays:
+            with archive.open(f"{name}.npy", "w", force_zip64=True) as f:
+                np.lib.format.write_array_header_2_0(
+                    f,
+                    {
+                        "descr": np.lib.format.dtype_to_descr(dtype),
+                        "fortran_order": False,
+                        "shape": shape,
+                    },
+                )
+                offset = 0
+                for shard in shards:
+                    with np.load(shard["path"]) as data:
+                        array = np.ascontiguousarray(data[name], dtype=dtype)
+                    f.write(array.tobytes())
+                    if name == "embeddings" and full is not None:
+                        full[offset : offset + len(array)] = array
+                    offset += len(array)
+
+        with archive.open("normalized.npy", "w") as f:
+            np.lib.format.write_array(f, np.array(normalized))
+
+    if full is not None:
+        full.flush()
+        del full
+
+    print(f"Saved {total} embeddings to {file_path}")
+    return total
+
+
+class ThroughputReport:
+    """Track and print import throughput"""
+
+    def __init__(self, documents: int = 0, chunks: int = 0, elapsed: float = 0.0):
+        self.documents = documents
+        self.chunks = chunks
+        self.previous_elapsed = elapsed
+        self.start = time.time()
+
+    @property
+    def elapsed(self) -> float:
+        return self.previous_elapsed + time.time() - self.start
+
+    def update(self, documents: int, chunks: int):
+        self.documents += documents
+        self.chunks += chunks
+
+    def summary(self) -> str:
+        elapsed = max(self.elapsed, 1e-9)
+        return (
+            f"{self.documents} documents, {self.chunks} chunks in {elapsed:.1f}s "
+            f"({self.documents / elapsed:.1f} docs/s, {self.chunks / elapsed:.1f} chunks/s)"
+        )
+
+
+def run_import(args: argparse.Namespace):
+    """Run the bulk import, resuming from the checkpoint when requested"""
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    checkpoint = load_checkpoint(args.output_dir) if args.resume else None
+    if args.resume and checkpoint is None:
+        print("No checkpoint found, starting from the beginning")
+
+    params = {name: getattr(args, name) for name in RESUME_PARAMS}
+    if checkpoint is None:
+        checkpoint = {
+            "params": params,
+            "documents_processed": 0,
+            "chunks_processed": 0,
+            "elapsed_seconds": 0.0,
+            "shards": [],
+            "csv_offsets": None,
+            "finished": False,
+        }
+    else:
+        saved = checkpoint.get("params", {})
+        changed = [name for name in RESUME_PARAMS if saved.get(name) != params[name]]
+        if changed:
+            raise ValueError(
+                f"Cannot resume: {', '.join(changed)} differ from the checkpoint, "
+                "rerun with the original arguments or use a new --output-dir"
+            )
+
+        print(f"Resuming after {checkpoint['documents_processed']} documents")
+
+    db = None
+    csv_writer = None
+    if args.graph == "neo4j":
+        from src.database.graph_handler import GraphDatabase
+
+        db = GraphDatabase(args.db_uri, args.db_user, args.db_password)
+        if not db.graph:
+            raise RuntimeError("Could not connect to the graph database")
+    elif args.graph == "csv":
+        csv_writer = CsvGraphWriter(args.output_dir, checkpoint["csv_offsets"])
+
+    report = ThroughputReport(
+        checkpoint["documents_processed"],
+        checkpoint["chunks_processed"],
+        checkpoint["elapsed_seconds"],
+    )
+
+    # Document streams are deterministic, so resuming just skips what was done
+    documents = itertools.islice(
+        open_document_stream(args), checkpoint["documents_processed"], args.limit
+    )
+
+    try:
+        for batch_number, batch in enumerate(batched(documents, args.batch_size), 1):
+            chunks = chunk_text(batch, args.chunk_size, args.chunk_overlap)
+
+            if chunks:
+                chunks = generate_embeddings(chunks, args.embedding_model)
+                shard = write_embedding_shard(
+                    args.output_dir,
+                    len(checkpoint["shards"]),
+                    chunks,
+                    normalize=args.normalize,
+                )
+                checkpoint["shards"].append(shard)
+
+                if db is not None:
+                    for i in range(0, len(chunks), args.graph_batch_size):
+                        db.add_chunks_batch(chunks[i : i + args.graph_batch_size])
+                if csv_writer is not None:
+                    csv_writer.write(chunks)
+
+            report.update(len(batch), len(chunks))
+
+            checkpoint["documents_processed"] = report.documents
+            checkpoint["chunks_processed"] = report.chunks
+            checkpoint["elapsed_seconds"] = report.elapsed
+            if csv_writer is not None:
+                checkpoint["csv_offsets"] = csv_writer.offsets()
+            save_checkpoint(args.output_dir, checkpoint)
+
+            if batch_number % args.report_every == 0:
+                print(f"Progress: {report.summary()}")
+    finally:
+        if csv_writer is not None:
+            csv_writer.close()
+
+    total = merge_embedding_shards(
+        checkpoint["shards"],
+        args.embeddings_file,
+        normalized=args.normalize,
+        write_full=bool(args.vector_index),
+    )
+    if args.vector_index and total > 0:
+        build_vector_index(args.embeddings_file, args.vector_index, extract=False)
+
+    checkpoint["finished"] = True
+    save_checkpoint(args.output_dir, checkpoint)
+
+    print(f"Import finished: {report.summary()}")
+    if args.graph == "csv":
+        print(
+            "Load the graph with: neo4j-admin database import full "
+            f"--nodes={os.path.join(args.output_dir, 'documents.csv')} "
+            f"--nodes={os.path.join(args.output_dir, 'chunks.csv')} "
+            f"--relationships={os.path.join(args.output_dir, 'part_of.csv')} "
+            f"--relationships={os.path.join(args.output_dir, 'follows.csv')} "
+            "--skip-duplicate-nodes --skip-bad-relationships neo4j"
+        )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Bulk import a local corpus into the vector store and graph"
+    )
+    parser.add_argument(
+        "--format", choices=["jsonl", "text", "wikipedia"], required=True
+    )
+    parser.add_argument(
+        "--input", required=True, help="JSONL file, text directory or XML dump"
+    )
+    parser.add_argument("--output-dir", default="bulk_import")
+    parser.add_argument(
+        "--embeddings-file",
+        default="embeddings.npz",
+        help="Merged vector store read at query time",
+    )
+    parser.add_argument(
+        "--graph",
+        choices=["neo4j", "csv", "none"],
+        default="csv",
+        help="Write the graph to Neo4j directly or as CSV for neo4j-admin import",
+    )
+    parser.add_argument(
+        "--normalize",
+        action="store_true",
+        default=NORMALIZE_EMBEDDINGS,
+        help="Store L2-normalised embeddings",
+    )
+    parser.add_argument(
+        "--vector-index",
+        choices=VECTOR_INDEX_METHODS,
+        default=VECTOR_INDEX,
+        help="Build a compressed index for two-stage search after the merge",
+    )
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument(
+        "--batch-size", type=int, default=1000, help="Documents per batch"
+    )
+    parser.add_argument(
+        "--graph-batch-size", type=int, default=5000, help="Chunks per transaction"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=None, help="Stop after this many documents"
+    )
+    parser.add_argument(
+        "--report-every", type=int, default=10, help="Batches between reports"
+    )
+    parser.add_argument("--embedding-model", default=EMBEDDING_MODEL)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--text-field", default="content")
+    parser.add_argument("--title-field", default="title")
+    parser.add_argument("--source-field", default="source")
+    parser.add_argument(
+        "--pattern", default=".txt", help="File suffix for text directories"
+    )
+    parser.add_argument("--db-uri", default=DATABASE_URI)
+    parser.add_argument("--db-user", default=DATABASE_USER)
+    parser.add_argument("--db-password", default=DATABASE_PASSWORD)
+    args = parser.parse_args(argv)
+    # The default comes from the environment and bypasses argparse's choices
+    if args.vector_index and args.vector_index not in VECTOR_INDEX_METHODS:
+        parser.error(f"invalid --vector-index: {args.vector_index}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    run_import(parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
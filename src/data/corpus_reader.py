@@ -0,0 +1,174 @@
+# src/data/corpus_reader.py
+import bz2
+import gzip
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Iterator, Optional
+
+WIKIPEDIA_BASE_URL = "https://en.wikipedia.org/wiki/"
+
+
+def _open_maybe_compressed(path: str, mode: str = "rt"):
+    """Open a plain, .gz or .bz2 file transparently"""
+    if path.endswith(".bz2"):
+        return bz2.open(path, mode, encoding="utf-8" if "t" in mode else None)
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8" if "t" in mode else None)
+    if "t" in mode:
+        return open(path, mode, encoding="utf-8")
+    return open(path, mode)
+
+
+def iter_jsonl_documents(
+    path: str,
+    text_field: str = "content",
+    title_field: str = "title",
+    source_field: str = "source",
+) -> Iterator[Dict[str, Any]]:
+    """Stream documents from a JSONL file, one JSON object per line"""
+    with _open_maybe_compressed(path) as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Skipping malformed line {line_number} in {path}: {str(e)}")
+                continue
+
+            if not isinstance(record, dict):
+                print(f"Skipping line {line_number} in {path}: not a JSON object")
+                continue
+
+            text = record.get(text_field) or record.get("text") or ""
+            source = record.get(source_field) or f"{path}:{line_number}"
+            title = record.get(title_field) or str(source)
+
+            yield {
+                "source": str(source),
+                "title": str(title),
+                "content": text,
+                "metadata": record.get("metadata") or {},
+            }
+
+
+def iter_text_documents(
+    directory: str, pattern: str = ".txt"
+) -> Iterator[Dict[str, Any]]:
+    """Stream documents from every matching text file below a directory"""
+    for root, dirs, files in os.walk(directory):
+        # Sort so that the iteration order is stable across runs (needed for resume)
+        dirs.sort()
+        for file_name in sorted(files):
+            if not file_name.endswith(pattern):
+                continue
+
+            path = os.path.join(root, file_name)
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            except OSError as e:
+                print(f"Error reading {path}: {str(e)}")
+                continue
+
+            yield {
+                "source": os.path.relpath(path, directory),
+                "title": os.path.splitext(file_name)[0],
+                "content": text,
+                "metadata": {"path": path},
+            }
+
+
+# Simple patterns to turn wikitext into readable plain text
+_WIKI_PATTERNS = [
+    (re.compile(r"<!--.*?-->", re.DOTALL), ""),
+    (re.compile(r"<ref[^>]*/>"), ""),
+    (re.compile(r"<ref[^>]*>.*?</ref>", re.DOTALL), ""),
+    (re.compile(r"\{\|.*?\|\}", re.DOTALL), ""),
+    (re.compile(r"\[\[(?:File|Image|Category):[^\]]*\]\]"), ""),
+    (re.compile(r"\[https?://[^\s\]]+ ([^\]]*)\]"), r"\1"),
+    (re.compile(r"'{2,}"), ""),
+    (re.compile(r"<[^>]+>"), ""),
+    (re.compile(r"^=+\s*(.*?)\s*=+\s*$", re.MULTILINE), r"\1"),
+]
+_WIKI_TEMPLATE = re.compile(r"\{\{[^{}]*\}\}")
+# Innermost [[target]] or [[target|label]] link, except File/Image/Category ones
+_WIKI_LINK = re.compile(
+    r"\[\[(?!(?:File|Image|Category):)(?:[^\[\]|]*\|)?([^\[\]]*)\]\]"
+)
+
+
+def strip_wikitext(text: str) -> str:
+    """Remove the most common wiki markup from an article body"""
+    # Templates can be nested, so strip the innermost ones until none are left
+    previous = None
+    while previous != text:
+        previous = text
+        text = _WIKI_TEMPLATE.sub("", text)
+
+    # Links can sit inside image captions, so unwrap them before files are removed
+    previous = None
+    while previous != text:
+        previous = text
+        text = _WIKI_LINK.sub(r"\1", text)
+
+    for pattern, replacement in _WIKI_PATTERNS:
+        text = pattern.sub(replacement, text)
+
+    return text
+
+
+def _local_name(tag: str) -> str:
+    """Strip the XML namespace from a tag name"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_wikipedia_dump(
+    path: str, base_url: str = WIKIPEDIA_BASE_URL
+) -> Iterator[Dict[str, Any]]:
+    """Stream articles from a (optionally bz2/gz compressed) Wikipedia XML dump"""
+    with _open_maybe_compressed(path, "rb") as f:
+        title: Optional[str] = None
+        namespace: Optional[str] = None
+        text: Optional[str] = None
+        page_id: Optional[str] = None
+        is_redirect = False
+        root = None
+
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if root is None:
+                root = elem
+            if event == "start":
+                continue
+
+            tag = _local_name(elem.tag)
+
+            if tag == "title":
+                title = elem.text
+            elif tag == "ns":
+                namespace = elem.text
+            elif tag == "id" and page_id is None:
+                # The first <id> of a page is the page id, later ones belong to revisions
+                page_id = elem.text
+            elif tag == "redirect":
+                is_redirect = True
+            elif tag == "text":
+                text = elem.text
+            elif tag == "page":
+                # Only keep real articles from the main namespace
+                if title and text and namespace == "0" and not is_redirect:
+                    yield {
+                        "source": base_url + title.replace(" ", "_"),
+                        "title": title,
+                        "content": strip_wikitext(text),
+                        "metadata": {"page_id": page_id or ""},
+                    }
+
+                title = namespace = text = page_id = None
+                is_redirect = False
+                # Free the parsed pages so memory stays flat on multi-GB dumps
+                root.clear()
@@ -3,14 +3,57 @@ import numpy as np
 from py2neo import Graph, Node, Relationship
 from tqdm import tqdm
 import os
+import random
+import time
+
+from src.database.vector_index import (
+    VECTOR_INDEX_METHODS,
+    CompressedVectorIndex,
+    build_vector_index,
+    index_paths,
+    normalize_embeddings,
+    remove_vector_index,
+    store_fingerprint,
+)
+
+# Upper bound on the number of nodes returned by any subgraph view
+MAX_SUBGRAPH_NODES = 500
 
 
 class GraphDatabase:
-    def __init__(self, uri: str, user: str, password: str):
+    def __init__(
+        self,
+        uri: str,
+        user: str,
+        password: str,
+        stats_ttl: float = 60.0,
+        normalize: bool = False,
+        vector_index: str = None,
+        oversample: int = 4,
+    ):
+        if vector_index:
+            vector_index = vector_index.lower()
+            if vector_index not in VECTOR_INDEX_METHODS:
+                raise ValueError(
+                    f"Unsupported vector index method: {vector_index}, "
+                    f"expected one of {', '.join(VECTOR_INDEX_METHODS)}"
+                )
+
         self.uri = uri
         self.user = user
         self.password = password
         self.graph = None
+        # Vector search: optional L2 normalisation and a compressed coarse index
+        # ("int8" or "pca") rescored exactly on the top_k * oversample candidates
+        self.normalize = normalize
+        self.vector_index = vector_index
+        self.oversample = oversample
+        self._index = None
+        self._index_key = None
+        # Graph statistics are cached for stats_ttl seconds and dropped on ingest
+        self.stats_ttl = stats_ttl
+        self._stats_cache = None
+        self._stats_time = 0.0
         self.connect()
 
     def run_query(self, query, params=None):
@@ -157,6 +200,298 @@ class GraphDatabase:
                             follows = Relationship(chunk_node, "FOLLOWS", prev_chunk)
                             self.graph.merge(follows)
 
+        self.invalidate_stats()
+
+    def add_chunks_batch(self, chunks: List[Dict[str, Any]]):
+        """Add a batch of chunks and their documents in a single transaction
+
+        Unlike add_documents_and_chunks this does not touch the embeddings file
+        and sends one UNWIND query per node/relationship type, which is what
+        the bulk importer needs for large corpora.
+        """
+        if not self.graph:
+            print("Database not connected")
+            return
+
+        documents = {}
+        for chunk in chunks:
+            source = chunk["source"]
+            if source not in documents:
+                # Only scalar metadata can be stored as node properties
+                metadata = {
+                    key: value
+                    for key, value in (chunk.get("metadata") or {}).items()
+                    if isinstance(value, (str, int, float, bool))
+                }
+                documents[source] = {
+                    "source": source,
+                    "title": chunk["title"],
+                    "metadata": metadata,
+                }
+
+        chunk_rows = [
+            {
+                "id": chunk["id"],
+                "text": chunk["text"],
+                "chunk_index": chunk["chunk_index"],
+                "source": chunk["source"],
+                "prev_id": (
+                    f"{chunk['source']}_{chunk['chunk_index'] - 1}"
+                    if chunk["chunk_index"] > 0
+                    else None
+                ),
+            }
+            for chunk in chunks
+        ]
+
+        tx = self.graph.begin()
+        tx.run(
+            """
+            UNWIND $rows AS row
+            MERGE (d:Document {source: row.source})
+            SET d.title = row.title, d += row.metadata
+            """,
+            rows=list(documents.values()),
+        )
+        tx.run(
+            """
+            UNWIND $rows AS row
+            MERGE (c:Chunk {id: row.id})
+            SET c.text = row.text, c.chunk_index = row.chunk_index
+            WITH c, row
+            MATCH (d:Document {source: row.source})
+            MERGE (c)-[:PART_OF]->(d)
+            """,
+            rows=chunk_rows,
+        )
+        tx.run(
+            """
+            UNWIND $rows AS row
+            WITH row WHERE row.prev_id IS NOT NULL
+            MATCH (c:Chunk {id: row.id})
+            MATCH (p:Chunk {id: row.prev_id})
+            MERGE (c)-[:FOLLOWS]->(p)
+            """,
+            rows=chunk_rows,
+        )
+        self.graph.commit(tx)
+        self.invalidate_stats()
+
+    def invalidate_stats(self):
+        """Drop the cached graph statistics"""
+        self._stats_cache = None
+
+    def get_graph_stats(self, refresh: bool = False) -> Dict[str, int]:
+        """
+        Return node and relationship counts
+
+        Each query is a bare label or type count, which Neo4j answers from its
+        count store instead of scanning, and the result is cached.
+        """
+        if not self.graph:
+            return {}
+
+        if (
+            not refresh
+            and self._stats_cache is not None
+            and time.time() - self._stats_time < self.stats_ttl
+        ):
+            return self._stats_cache
+
+        count_queries = {
+            "documents": "MATCH (d:Document) RETURN count(d)",
+            "chunks": "MATCH (c:Chunk) RETURN count(c)",
+            "relationships": "MATCH ()-[r]->() RETURN count(r)",
+            "part_of": "MATCH ()-[r:PART_OF]->() RETURN count(r)",
+            "follows": "MATCH ()-[r:FOLLOWS]->() RETURN count(r)",
+        }
+        stats = {
+            name: self.graph.evaluate(query) or 0
+            for name, query in count_queries.items()
+        }
+
+        self._stats_cache = stats
+        self._stats_time = time.time()
+        return stats
+
+    def list_documents(
+        self, title_prefix: str = "", skip: int = 0, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Return one page of documents, optionally filtered by title prefix"""
+        if not self.graph:
+            return []
+
+        cypher_query = """
+        MATCH (d:Document)
+        WHERE d.title STARTS WITH $prefix
+        RETURN d.source as source, d.title as title
+        ORDER BY d.title
+        SKIP $skip LIMIT $limit
+        """
+        return self.graph.run(
+            cypher_query, prefix=title_prefix, skip=skip, limit=limit
+        ).data()
+
+    def get_document_subgraph(
+        self, source: str, skip: int = 0, limit: int = 100, preview_chars: int = 80
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Return one page of a document's chunks in reading order
+
+        limit counts the document node too, so a page holds limit - 1 chunks.
+        """
+        limit = max(min(limit, MAX_SUBGRAPH_NODES) - 1, 1)
+        cypher_query = """
+        MATCH (d:Document {source: $source})
+        OPTIONAL MATCH (c:Chunk)-[:PART_OF]->(d)
+        WITH d, c ORDER BY c.chunk_index SKIP $skip LIMIT $limit
+        RETURN d.source as source, d.title as title,
+               collect({id: c.id, chunk_index: c.chunk_index,
+                        preview: left(c.text, $preview)}) as chunks
+        """
+        rows = self.graph.run(
+            cypher_query,
+            source=source,
+            skip=skip,
+            limit=limit,
+            preview=preview_chars,
+        ).data()
+        if not rows:
+            return {"nodes": [], "edges": []}
+
+        chunks = [
+            dict(chunk, source=source)
+            for chunk in rows[0]["chunks"]
+            if chunk["id"] is not None
+        ]
+        return self._build_subgraph(rows, chunks)
+
+    def get_chunk_neighbourhood(
+        self, chunk_id: str, depth: int = 1, limit: int = 100, preview_chars: int = 80
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Return a chunk, its document and the chunks within depth FOLLOWS hops"""
+        limit = min(limit, MAX_SUBGRAPH_NODES)
+        # Variable-length bounds cannot be query parameters
+        depth = max(1, min(int(depth), 5))
+        cypher_query = f"""
+        MATCH (c:Chunk {{id: $id}})
+        OPTIONAL MATCH (c)-[:PART_OF]->(d:Document)
+        OPTIONAL MATCH (c)-[:FOLLOWS*1..{depth}]-(n:Chunk)
+        WITH c, d, collect(DISTINCT n)[..$limit] as neighbours
+        UNWIND [c] + neighbours as chunk
+        RETURN d.source as source, d.title as title,
+               collect({{id: chunk.id, chunk_index: chunk.chunk_index,
+                         preview: left(chunk.text, $preview)}}) as chunks
+        """
+        rows = self.graph.run(
+            cypher_query, id=chunk_id, limit=max(limit - 2, 0), preview=preview_chars
+        ).data()
+        if not rows:
+            return {"nodes": [], "edges": []}
+
+        # Chunks reached through FOLLOWS always belong to the same document
+        chunks = [dict(chunk, source=rows[0]["source"]) for chunk in rows[0]["chunks"]]
+        return self._build_subgraph(
+            [row for row in rows if row["source"] is not None], chunks
+        )
+
+    def get_random_subgraph(
+        self,
+        documents: int = 5,
+        chunks_per_document: int = 10,
+        preview_chars: int = 80,
+        seed: int = None,
+        limit: int = MAX_SUBGRAPH_NODES,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Return the first chunks of a window of documents at a random offset
+
+        At most limit nodes are returned; every document keeps at least one chunk.
+        """
+        limit = max(min(limit, MAX_SUBGRAPH_NODES), 2)
+        documents = max(1, min(documents, limit // 2))
+        chunks_per_document = max(
+            1, min(chunks_per_document, (limit - documents) // documents)
+        )
+
+        # Skipping to a random offset streams the label scan without sorting
+        # every document by rand(), which would be a full scan plus a sort
+        doc_count = self.get_graph_stats().get("documents", 0)
+        if doc_count == 0:
+            return {"nodes": [], "edges": []}
+        offset = random.Random(seed).randrange(max(doc_count - documents, 0) + 1)
+
+        cypher_query = """
+        MATCH (d:Document)
+        WITH d SKIP $offset LIMIT $documents
+        OPTIONAL MATCH (c:Chunk)-[:PART_OF]->(d)
+        WHERE c.chunk_index < $per_doc
+        RETURN d.source as source, d.title as title,
+               collect({id: c.id, chunk_index: c.chunk_index,
+                        preview: left(c.text, $preview)}) as chunks
+        """
+        rows = self.graph.run(
+            cypher_query,
+            offset=offset,
+            documents=documents,
+            per_doc=chunks_per_document,
+            preview=preview_chars,
+        ).data()
+
+        chunks = [
+            dict(chunk, source=row["source"])
+            for row in rows
+            for chunk in row["chunks"]
+            if chunk["id"] is not None
+        ]
+        return self._build_subgraph(rows, chunks)
+
+    def _build_subgraph(
+        self, documents: List[Dict[str, Any]], chunks: List[Dict[str, Any]]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Assemble nodes and edges for a bounded set of documents and chunks"""
+        nodes = []
+        edges = []
+        seen = set()
+
+        for doc in documents:
+            if doc["source"] not in seen:
+                seen.add(doc["source"])
+                nodes.append(
+                    {"id": doc["source"], "label": doc["title"], "type": "Document"}
+                )
+
+        chunk_ids = []
+        for chunk in chunks:
+            if chunk["id"] in seen:
+                continue
+            seen.add(chunk["id"])
+            chunk_ids.append(chunk["id"])
+            nodes.append(
+                {
+                    "id": chunk["id"],
+                    "label": f"Chunk {chunk['chunk_index']}",
+                    "type": "Chunk",
+                    "preview": chunk.get("preview") or "",
+                }
+            )
+            if chunk["source"] in seen:
+                edges.append(
+                    {"source": chunk["id"], "target": chunk["source"], "type": "PART_OF"}
+                )
+
+        # FOLLOWS edges between the selected chunks only, via the id index
+        if chunk_ids:
+            cypher_query = """
+            MATCH (a:Chunk)-[:FOLLOWS]->(b:Chunk)
+            WHERE a.id IN $ids AND b.id IN $ids
+            RETURN a.id as source, b.id as target
+            """
+            for row in self.graph.run(cypher_query, ids=chunk_ids).data():
+                edges.append(
+                    {"source": row["source"], "target": row["target"], "type": "FOLLOWS"}
+                )
+
+        return {"nodes": nodes, "edges": edges}
+
     def store_embeddings_as_file(self, chunks: List[Dict[str, Any]], file_path: str):
         """Store embeddings separately as a numpy file for faster retrieval"""
         # Make sure the directory exists
@@ -165,24 +500,65 @@ class GraphDatabase:
         embeddings = np.array([chunk["embedding"] for chunk in chunks])
         ids = np.array([chunk["id"] for chunk in chunks])
 
-        np.savez(file_path, embeddings=embeddings, ids=ids)
+        if self.normalize:
+            embeddings = normalize_embeddings(embeddings)
+
+        np.savez(
+            file_path,
+            embeddings=embeddings,
+            ids=ids,
+            normalized=np.array(self.normalize),
+        )
         print(f"Saved embeddings to {file_path}")
 
+        # Index files from a previous version of the store must not be reused
+        remove_vector_index(file_path)
+        if self.vector_index and len(ids) > 0:
+            _, full_path = index_paths(file_path)
+            np.save(full_path, np.asarray(embeddings, dtype=np.float32))
+            build_vector_index(file_path, self.vector_index, extract=False)
+
+    def _load_vector_index(self, file_path: str):
+        """Return the compressed index for file_path, reloading it when it changes"""
+        codes_path, _ = index_paths(file_path)
+        if not os.path.exists(codes_path) or not os.path.exists(file_path):
+            return None
+
+        key = (os.path.getmtime(codes_path), store_fingerprint(file_path))
+        if self._index_key != key:
+            # load() returns None for an index built from another store version
+            self._index = CompressedVectorIndex.load(file_path)
+            self._index_key = key
+        return self._index
+
     def find_similar_chunks(self, query_embedding: np.ndarray, top_k: int = 5):
         """Find chunks similar to the query using the stored embeddings"""
         try:
-            # Load embeddings from file
-            embeddings_file = np.load("embeddings.npz")
-            embeddings = embeddings_file["embeddings"]
-            ids = embeddings_file["ids"]
-
-            # Calculate similarity scores
-            scores = np.dot(embeddings, query_embedding)
-
-            # Get top k results
-            top_indices = np.argsort(scores)[-top_k:][::-1]
-            top_scores = scores[top_indices]
-            top_ids = ids[top_indices]
+            index = (
+                self._load_vector_index("embeddings.npz") if self.vector_index else None
+            )
+            if self.normalize or (index is not None and index.normalized):
+                query_embedding = normalize_embeddings(query_embedding)
+
+            if index is not None:
+                # Coarse scan over compressed codes, exact rescoring of candidates
+                top_indices, top_scores = index.search(
+                    query_embedding, top_k=top_k, oversample=self.oversample
+                )
+                top_ids = index.ids[top_indices]
+            else:
+                # Load embeddings from file
+                embeddings_file = np.load("embeddings.npz")
+                embeddings = embeddings_file["embeddings"]
+                ids = embeddings_file["ids"]
+
+                # Calculate similarity scores
+                scores = np.dot(embeddings, query_embedding)
+
+                # Get top k results
+                top_indices = np.argsort(scores)[-top_k:][::-1]
+                top_scores = scores[top_indices]
+                top_ids = ids[top_indices]
 
             # Retrieve the actual chunks from the database
             results = []
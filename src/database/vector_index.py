@@ -0,0 +1,491 @@
+# src/database/vector_index.py
+"""
+Compressed two-stage vector search
+
+A coarse pass scores the query against compressed codes (int8 scalar
+quantisation or PCA-reduced vectors), then an over-fetched candidate set is
+rescored exactly against full-precision vectors memory-mapped from disk.
+
+For a vector store `embeddings.npz` the index lives next to it in
+`embeddings.index.npz` (codes) and `embeddings.full.npy` (float32 vectors).
+The index records the size and mtime of the store it was built from and is
+ignored once the store has been rewritten.
+
+Measure recall against exact search on held-out rows with:
+    python -m src.database.vector_index --embeddings-file embeddings.npz --method int8
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+VECTOR_INDEX_METHODS = ("int8", "pca")
+
+# Rows processed per block, bounds the temporary float buffers
+_BLOCK_SIZE = 65536
+
+
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """L2-normalise vectors so that dot products are cosine similarities"""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+def index_paths(embeddings_file: str) -> Tuple[str, str]:
+    """Return the compressed code file and full-precision file for a vector store"""
+    base = os.path.splitext(embeddings_file)[0]
+    return base + ".index.npz", base + ".full.npy"
+
+
+def remove_vector_index(embeddings_file: str):
+    """Delete the index files of a vector store, e.g. after it was rewritten"""
+    for path in index_paths(embeddings_file):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def store_fingerprint(embeddings_file: str) -> Tuple[int, int]:
+    """Size and modification time identifying one version of a vector store"""
+    stat = os.stat(embeddings_file)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def store_is_normalized(embeddings_file: str) -> bool:
+    """Whether the vector store was written with L2-normalised embeddings"""
+    with np.load(embeddings_file) as data:
+        return "normalized" in data.files and bool(data["normalized"])
+
+
+def _iter_store_blocks(
+    embeddings_file: str, block_size: int = _BLOCK_SIZE
+) -> Iterator[np.ndarray]:
+    """Stream the embeddings matrix of a .npz store in blocks of rows"""
+    with zipfile.ZipFile(embeddings_file) as archive:
+        with archive.open("embeddings.npy") as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if fortran_order or len(shape) != 2:
+                raise ValueError(f"Unexpected embeddings layout in {embeddings_file}")
+
+            row_bytes = shape[1] * dtype.itemsize
+            for _ in range(0, shape[0], block_size):
+                data = f.read(block_size * row_bytes)
+                yield np.frombuffer(data, dtype=dtype).reshape(-1, shape[1])
+
+
+def extract_full_vectors(
+    embeddings_file: str,
+    full_path: str,
+    normalize: bool = False,
+    holdout: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Stream a store's embeddings into a memory-mappable float32 .npy file
+
+    Rows listed in holdout are returned separately instead of being written.
+    """
+    with np.load(embeddings_file) as data:
+        num_rows = len(data["ids"])
+    holdout = np.sort(holdout) if holdout is not None else np.array([], dtype=int)
+
+    full = None
+    held = []
+    written = 0
+    start = 0
+    for block in _iter_store_blocks(embeddings_file):
+        block = np.asarray(block, dtype=np.float32)
+        if normalize:
+            block = normalize_embeddings(block)
+        if full is None:
+            full = np.lib.format.open_memmap(
+                full_path,
+                mode="w+",
+                dtype=np.float32,
+                shape=(num_rows - len(holdout), block.shape[1]),
+            )
+
+        mask = np.isin(np.arange(start, start + len(block)), holdout)
+        held.append(block[mask])
+        kept = block[~mask]
+        full[written : written + len(kept)] = kept
+        written += len(kept)
+        start += len(block)
+
+    if full is None:
+        raise ValueError(f"No embeddings to index in {embeddings_file}")
+    full.flush()
+    del full
+
+    return np.load(full_path, mmap_mode="r"), np.concatenate(held)
+
+
+class CompressedVectorIndex:
+    """Compressed codes for a coarse scan plus full vectors for exact rescoring"""
+
+    def __init__(
+        self,
+        method: str,
+        codes: np.ndarray,
+        ids: np.ndarray,
+        full_vectors: np.ndarray,
+        scale: Optional[np.ndarray] = None,
+        components: Optional[np.ndarray] = None,
+        normalized: bool = False,
+    ):
+        if method not in VECTOR_INDEX_METHODS:
+            raise ValueError(f"Unsupported vector index method: {method}")
+        self.method = method
+        self.codes = codes
+        self.ids = ids
+        self.full_vectors = full_vectors
+        self.scale = scale
+        self.components = components
+        self.normalized = normalized
+
+    @classmethod
+    def build(
+        cls,
+        full_vectors: np.ndarray,
+        ids: np.ndarray,
+        method: str = "int8",
+        pca_dims: int = 64,
+        sample_size: int = 100000,
+        normalized: bool = False,
+    ) -> "CompressedVectorIndex":
+        """Compress full-precision vectors block by block (they may be a memmap)"""
+        num_rows, dim = full_vectors.shape
+        if num_rows == 0:
+            raise ValueError("Cannot build a vector index over an empty store")
+
+        if method == "int8":
+            # Symmetric per-dimension scale so each dimension uses the full range
+            max_abs = np.zeros(dim, dtype=np.float32)
+            for start in range(0, num_rows, _BLOCK_SIZE):
+                block = np.asarray(full_vectors[start : start + _BLOCK_SIZE])
+                max_abs = np.maximum(max_abs, np.abs(block).max(axis=0))
+            scale = np.maximum(max_abs / 127.0, 1e-12).astype(np.float32)
+
+            codes = np.empty((num_rows, dim), dtype=np.int8)
+            for start in range(0, num_rows, _BLOCK_SIZE):
+                block = np.asarray(full_vectors[start : start + _BLOCK_SIZE])
+                codes[start : start + _BLOCK_SIZE] = np.clip(
+                    np.rint(block / scale), -127, 127
+                ).astype(np.int8)
+            return cls(
+                method, codes, ids, full_vectors, scale=scale, normalized=normalized
+            )
+
+        if method == "pca":
+            # Principal directions estimated on a sample of the vectors
+            if num_rows > sample_size:
+                rng = np.random.default_rng(0)
+                rows = np.sort(rng.choice(num_rows, sample_size, replace=False))
+                sample = np.asarray(full_vectors[rows], dtype=np.float32)
+            else:
+                sample = np.asarray(full_vectors, dtype=np.float32)
+            centered = sample - sample.mean(axis=0)
+            _, eigenvectors = np.linalg.eigh(centered.T @ centered)
+            dims = min(pca_dims, dim)
+            components = eigenvectors[:, ::-1][:, :dims].astype(np.float32)
+
+            # The mean is not subtracted: its contribution to the score is the
+            # same for every vector, so rankings are unaffected
+            codes = np.empty((num_rows, dims), dtype=np.float16)
+            for start in range(0, num_rows, _BLOCK_SIZE):
+                block = np.asarray(full_vectors[start : start + _BLOCK_SIZE])
+                codes[start : start + _BLOCK_SIZE] = block @ components
+            return cls(
+                method,
+                codes,
+                ids,
+                full_vectors,
+                components=components,
+                normalized=normalized,
+            )
+
+        raise ValueError(f"Unsupported vector index method: {method}")
+
+    def save(self, embeddings_file: str):
+        """Write the codes, tagged with the version of the store they were built from"""
+        codes_path, _ = index_paths(embeddings_file)
+        size, mtime_ns = store_fingerprint(embeddings_file)
+
+        arrays = {
+            "method": np.array(self.method),
+            "codes": self.codes,
+            "ids": self.ids,
+            "normalized": np.array(self.normalized),
+            "store_size": np.array(size),
+            "store_mtime_ns": np.array(mtime_ns),
+        }
+        if self.scale is not None:
+            arrays["scale"] = self.scale
+        if self.components is not None:
+            arrays["components"] = self.components
+        np.savez(codes_path, **arrays)
+        print(f"Saved {self.method} vector index to {codes_path}")
+
+    @classmethod
+    def load(cls, embeddings_file: str) -> Optional["CompressedVectorIndex"]:
+        """
+        Load the codes and memory-map the full-precision vectors
+
+        Returns None when there is no index or it was built from another
+        version of the store.
+        """
+        codes_path, full_path = index_paths(embeddings_file)
+        if not (
+            os.path.exists(embeddings_file)
+            and os.path.exists(codes_path)
+            and os.path.exists(full_path)
+        ):
+            return None
+
+        with np.load(codes_path) as data:
+            fingerprint = (int(data["store_size"]), int(data["store_mtime_ns"]))
+            if fingerprint != store_fingerprint(embeddings_file):
+                print(f"Ignoring stale vector index {codes_path}")
+                return None
+
+            full_vectors = np.load(full_path, mmap_mode="r")
+            if len(full_vectors) != len(data["ids"]):
+                print(f"Ignoring vector index with mismatched {full_path}")
+                return None
+
+            return cls(
+                str(data["method"]),
+                data["codes"],
+                data["ids"],
+                full_vectors,
+                scale=data["scale"] if "scale" in data.files else None,
+                components=data["components"] if "components" in data.files else None,
+                normalized=bool(data["normalized"]),
+            )
+
+    @property
+    def code_bytes(self) -> int:
+        return self.codes.nbytes
+
+    @property
+    def full_bytes(self) -> int:
+        return self.full_vectors.nbytes
+
+    def coarse_scores(self, query_embedding: np.ndarray) -> np.ndarray:
+        """Approximate dot products between the query and every stored vector"""
+        query = np.asarray(query_embedding, dtype=np.float32)
+
+        if self.method == "int8":
+            # (codes * scale) . q == codes . (q * scale)
+            query = query * self.scale
+        else:
+            query = query @ self.components
+
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), _BLOCK_SIZE):
+            block = self.codes[start : start + _BLOCK_SIZE]
+            scores[start : start + _BLOCK_SIZE] = block.astype(np.float32) @ query
+        return scores
+
+    def search(
+        self, query_embedding: np.ndarray, top_k: int = 5, oversample: int = 4
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the indices and exact scores of the top_k vectors"""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        top_k = min(top_k, len(self.codes))
+        if top_k == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+
+        # Coarse pass over the compressed codes
+        coarse = self.coarse_scores(query)
+        num_candidates = min(top_k * max(oversample, 1), len(coarse))
+        candidates = np.argpartition(coarse, -num_candidates)[-num_candidates:]
+
+        # Exact rescoring; sorted indices keep the reads from disk sequential
+        candidates.sort()
+        exact = np.asarray(self.full_vectors[candidates], dtype=np.float32) @ query
+
+        order = np.argsort(exact)[::-1][:top_k]
+        return candidates[order], exact[order]
+
+
+def exact_search(
+    embeddings: np.ndarray, query_embedding: np.ndarray, top_k: int = 5
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Brute-force dot-product search over full-precision vectors, block by block"""
+    query = np.asarray(query_embedding, dtype=np.float32)
+    scores = np.empty(len(embeddings), dtype=np.float32)
+    for start in range(0, len(embeddings), _BLOCK_SIZE):
+        block = np.asarray(embeddings[start : start + _BLOCK_SIZE], dtype=np.float32)
+        scores[start : start + _BLOCK_SIZE] = block @ query
+    top_indices = np.argsort(scores)[-top_k:][::-1]
+    return top_indices, scores[top_indices]
+
+
+def build_vector_index(
+    embeddings_file: str, method: str = "int8", extract: bool = True, **kwargs
+) -> Optional[CompressedVectorIndex]:
+    """
+    Build and save a compressed index for a vector store
+
+    With extract=False the caller has already written the .full.npy file
+    alongside the store. Returns None (and removes old index files) when the
+    store is empty.
+    """
+    codes_path, full_path = index_paths(embeddings_file)
+    with np.load(embeddings_file) as data:
+        ids = data["ids"]
+    if len(ids) == 0:
+        remove_vector_index(embeddings_file)
+        return None
+
+    # The code file is written last, so a stale one must not survive a failure
+    if os.path.exists(codes_path):
+        os.remove(codes_path)
+
+    if extract:
+        full_vectors, _ = extract_full_vectors(embeddings_file, full_path)
+    else:
+        full_vectors = np.load(full_path, mmap_mode="r")
+
+    index = CompressedVectorIndex.build(
+        full_vectors,
+        ids,
+        method=method,
+        normalized=store_is_normalized(embeddings_file),
+        **kwargs,
+    )
+    index.save(embeddings_file)
+    return index
+
+
+def evaluate_recall(
+    index: CompressedVectorIndex,
+    queries: np.ndarray,
+    top_k: int = 10,
+    oversample_factors: List[int] = (1, 2, 4, 8),
+) -> List[Dict[str, Any]]:
+    """Report recall@k and latency of two-stage search against exact search"""
+    start = time.perf_counter()
+    truth = [
+        set(exact_search(index.full_vectors, q, top_k)[0].tolist()) for q in queries
+    ]
+    exact_latency = (time.perf_counter() - start) / len(queries)
+
+    results = []
+    for oversample in oversample_factors:
+        hits = 0
+        start = time.perf_counter()
+        for query, expected in zip(queries, truth):
+            found, _ = index.search(query, top_k=top_k, oversample=oversample)
+            hits += len(expected.intersection(found.tolist()))
+        latency = (time.perf_counter() - start) / len(queries)
+
+        results.append(
+            {
+                "oversample": oversample,
+                f"recall@{top_k}": hits / (len(queries) * min(top_k, len(index.codes))),
+                "latency_ms": latency * 1000,
+                "exact_latency_ms": exact_latency * 1000,
+            }
+        )
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Report recall@k of a compressed vector index against exact search"
+    )
+    parser.add_argument("--embeddings-file", default="embeddings.npz")
+    parser.add_argument("--method", choices=VECTOR_INDEX_METHODS, default="int8")
+    parser.add_argument("--pca-dims", type=int, default=64)
+    parser.add_argument(
+        "--normalize",
+        action="store_true",
+        help="L2-normalise the evaluation copy of the vectors",
+    )
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=100,
+        help="Stored vectors held out of the evaluation index and used as queries",
+    )
+    parser.add_argument(
+        "--query-file", help=".npy file of real query embeddings to use instead"
+    )
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--oversample", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="Also build and save the index used by the app for this store",
+    )
+    args = parser.parse_args(argv)
+    if args.save and args.normalize:
+        parser.error(
+            "--save indexes the store as written; re-import with normalised "
+            "embeddings instead of combining it with --normalize"
+        )
+
+    kwargs = {"pca_dims": args.pca_dims} if args.method == "pca" else {}
+
+    with np.load(args.embeddings_file) as data:
+        num_rows = len(data["ids"])
+    if num_rows < 2:
+        parser.error(f"{args.embeddings_file} has too few vectors to evaluate")
+
+    if args.query_file:
+        queries = np.load(args.query_file).astype(np.float32)
+        if args.normalize:
+            queries = normalize_embeddings(queries)
+        holdout = None
+    else:
+        rng = np.random.default_rng(0)
+        holdout = rng.choice(num_rows, min(args.queries, num_rows - 1), replace=False)
+
+    # The evaluation index lives in a temporary directory so the live one is untouched
+    tmp_dir = tempfile.mkdtemp(prefix="vector_index_eval_")
+    try:
+        full_vectors, held = extract_full_vectors(
+            args.embeddings_file,
+            os.path.join(tmp_dir, "full.npy"),
+            normalize=args.normalize,
+            holdout=holdout,
+        )
+        if holdout is not None:
+            queries = held
+
+        index = CompressedVectorIndex.build(
+            full_vectors, np.arange(len(full_vectors)), method=args.method, **kwargs
+        )
+        print(
+            f"Codes: {index.code_bytes / 1e6:.1f} MB, "
+            f"full precision: {index.full_bytes / 1e6:.1f} MB, "
+            f"{len(queries)} queries"
+        )
+
+        for row in evaluate_recall(index, queries, args.top_k, args.oversample):
+            print(
+                f"oversample={row['oversample']}: "
+                f"recall@{args.top_k}={row[f'recall@{args.top_k}']:.3f}, "
+                f"{row['latency_ms']:.2f} ms/query "
+                f"(exact {row['exact_latency_ms']:.2f} ms/query)"
+            )
+        del index, full_vectors
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if args.save:
+        build_vector_index(args.embeddings_file, args.method, **kwargs)
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,9 @@ class MinimalRAG:
         db_password: str = "password",
         chunk_size: int = 500,
         chunk_overlap: int = 50,
+        normalize_embeddings: bool = False,
+        vector_index: str = None,
+        oversample: int = 4,
     ):
         self.embedding_model_name = embedding_model
         self.llm_model = llm_model
@@ -32,7 +35,14 @@ class MinimalRAG:
         self.chunk_overlap = chunk_overlap
 
         # Initialize database connection
-        self.db = GraphDatabase(db_uri, db_user, db_password)
+        self.db = GraphDatabase(
+            db_uri,
+            db_user,
+            db_password,
+            normalize=normalize_embeddings,
+            vector_index=vector_index,
+            oversample=oversample,
+        )
 
     def ingest_data(self, urls: List[str]) -> None:
         """Ingest data from URLs end-to-end"""